@@ -1,7 +1,9 @@
 from fastapi import FastAPI, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.concurrency import run_in_threadpool
 import io
+import os
 import pandas as pd
 
 # Core reconciliation utilities (minimal placeholders to keep service functional)
@@ -12,6 +14,21 @@ from core.matcher import (
     build_output_sheet,
     ai_only_match,
 )
+from core.excel_io import read_table
+from core.columnar import prepare_inputs
+
+# Motor de preparación: "pandas" (por defecto) o "columnar" (ver core/columnar.py)
+ENGINES = {"pandas", "columnar"}
+ENGINE = os.getenv("CONCILIADOR_ENGINE", "pandas").strip().lower()
+if ENGINE not in ENGINES:
+    raise RuntimeError(
+        f"CONCILIADOR_ENGINE={ENGINE!r} no válido; opciones: {', '.join(sorted(ENGINES))}"
+    )
+# Procesos para el motor columnar (1 = en el proceso del servidor)
+try:
+    WORKERS = int(os.getenv("CONCILIADOR_WORKERS", "1"))
+except ValueError:
+    raise RuntimeError("CONCILIADOR_WORKERS debe ser un entero") from None
 
 app = FastAPI(title="Conciliador")
 
@@ -44,48 +61,34 @@ async def reconcile(
     ventas: UploadFile = File(...),
     compras: UploadFile = File(...),
 ):
-    async def read_any(f: UploadFile, kind: str) -> pd.DataFrame:
-        content = await f.read()
-        bio = io.BytesIO(content)
-        name = (f.filename or "").lower()
-        if name.endswith(".csv"):
-            return pd.read_csv(bio, dtype=str)
-        # Excel: intentar seleccionar hoja por nombre segun tipo
-        try:
-            xls = pd.ExcelFile(bio)
-            sheets = [s.lower() for s in xls.sheet_names]
-            preferred = []
-            if kind == "extracto":
-                preferred = ["movimientos", "extracto", "sheet1", "hoja1"]
-            elif kind == "ventas":
-                preferred = ["hoja1", "ventas", "sheet1"]
-            elif kind == "compras":
-                preferred = ["hoja1", "compras", "sheet1"]
-            pick = next((orig for s, orig in zip(sheets, xls.sheet_names) if s in preferred), None)
-            if pick is None:
-                pick = xls.sheet_names[0]
-            return pd.read_excel(xls, sheet_name=pick, dtype=str)
-        except Exception:
-            # fallback lectura directa
-            bio.seek(0)
-            return pd.read_excel(bio, dtype=str)
+    if ENGINE == "columnar":
+        # Libros proyectados, parseo memoizado y frames preparados en el lugar
+        uploads = [(await f.read(), f.filename or "") for f in (extracto, ventas, compras)]
+        E, V, C = await run_in_threadpool(prepare_inputs, *uploads, workers=WORKERS)
+        del uploads
+    else:
+        async def read_any(f: UploadFile, kind: str) -> pd.DataFrame:
+            content = await f.read()
+            return read_table(content, f.filename or "", kind)
 
-    ext_df = await read_any(extracto, "extracto")
-    ven_df = await read_any(ventas, "ventas")
-    com_df = await read_any(compras, "compras")
+        ext_df = await read_any(extracto, "extracto")
+        ven_df = await read_any(ventas, "ventas")
+        com_df = await read_any(compras, "compras")
 
-    # Minimal pipeline – core functions can be expanded later
-    E, _ = prep_extracto(ext_df)
-    V, _ = prep_libro(ven_df, origen="Ventas")
-    C, _ = prep_libro(com_df, origen="Compras")
+        # Minimal pipeline – core functions can be expanded later
+        E, _ = prep_extracto(ext_df)
+        V, _ = prep_libro(ven_df, origen="Ventas")
+        C, _ = prep_libro(com_df, origen="Compras")
     # Si hay OPENAI_API_KEY y se solicita IA, usar AI-only
-    import os
     use_ai_only = bool(os.getenv("OPENAI_API_KEY"))
     if use_ai_only:
         best = ai_only_match(E, V, C)
     else:
         best = multipass_match(E, V, C)
-    sheet = build_output_sheet(ext_df, E, best, ventas=V, compras=C)
+    if ENGINE == "columnar":
+        sheet = build_output_sheet(E, E, best, ventas=V, compras=C, copy=False)
+    else:
+        sheet = build_output_sheet(ext_df, E, best, ventas=V, compras=C)
 
     out = io.BytesIO()
     with pd.ExcelWriter(out, engine="openpyxl") as writer:
@@ -0,0 +1,119 @@
+"""
+Motor columnar alternativo para la conciliación (CONCILIADOR_ENGINE=columnar).
+
+Diferencias con el motor pandas por defecto:
+- Ventas/compras se proyectan a las columnas que usan detect_libro_columns y
+  detect_columns antes de normalizar. El archivo se parsea completo (openpyxl
+  lee todas las celdas igual y en CSV así se conservan los errores y el índice
+  de pandas); el extracto no se proyecta porque sale entero en la hoja.
+- Los parsers por fila (fechas, importes, texto) reutilizan el resultado de
+  valores repetidos en lugar de recalcularlos fila a fila.
+- Normaliza y arma la salida sobre los mismos frames en lugar de copiarlos.
+- Opcional (CONCILIADOR_WORKERS > 1): prepara los tres archivos en procesos
+  separados. Implica serializar los archivos y los frames preparados entre
+  procesos, así que por defecto todo corre en el proceso actual.
+
+El resultado debe ser idéntico al del motor pandas (ver tests/test_engine_parity.py).
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import os
+import threading
+from typing import Optional, Tuple
+import pandas as pd
+
+from .excel_io import read_table
+from .matcher import prep_extracto, prep_libro
+from .normalize import normalize_columns, resolve_libro_projection
+
+
+Upload = Tuple[bytes, str]
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+
+def available_cpus() -> int:
+    # Respeta la afinidad del contenedor cuando el sistema la expone
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    # Pool persistente: los workers importan pandas una sola vez
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(max_workers=3, mp_context=multiprocessing.get_context("spawn"))
+        return _POOL
+
+
+def _reset_pool(pool: ProcessPoolExecutor) -> None:
+    # Un worker muerto (p. ej. OOM) deja el pool roto: descartarlo para que el próximo uso cree otro
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is pool:
+            _POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _projection(df: pd.DataFrame) -> Optional[list[int]]:
+    """Posiciones de las columnas a conservar, o None si hay que quedarse con todas."""
+    slugs = list(normalize_columns(df.head(0)).columns)
+    keep = resolve_libro_projection(slugs)
+    # Nombres normalizados repetidos: dejar que normalize resuelva como siempre
+    if keep is None or len(set(slugs)) != len(slugs) or len(keep) == len(slugs):
+        return None
+    return [i for i, s in enumerate(slugs) if s in keep]
+
+
+def read_libro_projected(content: bytes, filename: str, kind: str) -> pd.DataFrame:
+    df = read_table(content, filename, kind)
+    positions = _projection(df)
+    return df if positions is None else df.iloc[:, positions]
+
+
+def _prep_extracto(upload: Upload) -> pd.DataFrame:
+    content, filename = upload
+    prepared, _ = prep_extracto(read_table(content, filename, "extracto"), copy=False, memoize=True)
+    return prepared
+
+
+def _prep_libro(upload: Upload, kind: str, origen: str) -> pd.DataFrame:
+    content, filename = upload
+    prepared, _ = prep_libro(read_libro_projected(content, filename, kind), origen=origen, copy=False, memoize=True)
+    return prepared
+
+
+def _prepare_local(extracto: Upload, ventas: Upload, compras: Upload) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    return _prep_extracto(extracto), _prep_libro(ventas, "ventas", "Ventas"), _prep_libro(compras, "compras", "Compras")
+
+
+def prepare_inputs(
+    extracto: Upload,
+    ventas: Upload,
+    compras: Upload,
+    workers: int = 1,
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Lee y normaliza los tres archivos (contenido, nombre).
+    Devuelve (extracto, ventas, compras) ya preparados para el matcher.
+    workers: procesos a usar (acotado a los CPUs disponibles); 1 = en el proceso actual.
+    """
+    if min(workers, 3, available_cpus()) <= 1:
+        return _prepare_local(extracto, ventas, compras)
+
+    pool = _get_pool()
+    try:
+        fut_e = pool.submit(_prep_extracto, extracto)
+        fut_v = pool.submit(_prep_libro, ventas, "ventas", "Ventas")
+        fut_c = pool.submit(_prep_libro, compras, "compras", "Compras")
+        return fut_e.result(), fut_v.result(), fut_c.result()
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        return _prepare_local(extracto, ventas, compras)
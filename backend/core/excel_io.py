@@ -1,9 +1,48 @@
 from __future__ import annotations
 
 import io
+from typing import Optional
 import pandas as pd
 
 
+# Hojas preferidas por tipo de archivo (en minúsculas)
+PREFERRED_SHEETS = {
+    "extracto": ["movimientos", "extracto", "sheet1", "hoja1"],
+    "ventas": ["hoja1", "ventas", "sheet1"],
+    "compras": ["hoja1", "compras", "sheet1"],
+}
+
+
+def pick_sheet(sheet_names: list[str], kind: str) -> str:
+    preferred = PREFERRED_SHEETS.get(kind, [])
+    pick = next((orig for orig in sheet_names if orig.lower() in preferred), None)
+    return pick if pick is not None else sheet_names[0]
+
+
+def read_table(
+    content: bytes,
+    filename: str,
+    kind: str,
+    usecols: Optional[list[int]] = None,
+    nrows: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Lee un CSV/Excel subido como strings. En Excel intenta seleccionar la hoja
+    por nombre segun tipo. usecols (posiciones) permite leer solo algunas columnas.
+    """
+    bio = io.BytesIO(content)
+    if filename.lower().endswith(".csv"):
+        return pd.read_csv(bio, dtype=str, usecols=usecols, nrows=nrows)
+    try:
+        xls = pd.ExcelFile(bio)
+        pick = pick_sheet(xls.sheet_names, kind)
+        return pd.read_excel(xls, sheet_name=pick, dtype=str, usecols=usecols, nrows=nrows)
+    except Exception:
+        # fallback lectura directa
+        bio.seek(0)
+        return pd.read_excel(bio, dtype=str, usecols=usecols, nrows=nrows)
+
+
 def write_excel_multiple(sheets: dict[str, pd.DataFrame]) -> io.BytesIO:
     """
     Escribe múltiples hojas a un Excel en memoria. No se usa en la ruta mínima
@@ -15,5 +54,3 @@ def write_excel_multiple(sheets: dict[str, pd.DataFrame]) -> io.BytesIO:
             df.to_excel(writer, index=False, sheet_name=str(name)[:31])
     buffer.seek(0)
     return buffer
-
-
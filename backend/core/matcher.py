@@ -10,15 +10,15 @@ from .normalize import coerce_dataframe, ColumnHints, coerce_extracto, coerce_li
 from .ai_assist import rerank_candidates_with_ai
 
 
-def prep_extracto(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Any]]:
-    prepared, hints_map = coerce_extracto(df)
+def prep_extracto(df: pd.DataFrame, copy: bool = True, memoize: bool = False) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    prepared, hints_map = coerce_extracto(df, copy=copy, memoize=memoize)
     hints = ColumnHints(date_col="fecha", amount_col="monto", desc_col="texto", id_col="__id__")
     meta = {"source": "extracto", "rows": len(prepared), "hints": hints.__dict__}
     return prepared, meta
 
 
-def prep_libro(df: pd.DataFrame, origen: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
-    prepared, hints_map = coerce_libro(df, origen)
+def prep_libro(df: pd.DataFrame, origen: str, copy: bool = True, memoize: bool = False) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    prepared, hints_map = coerce_libro(df, origen, copy=copy, memoize=memoize)
     hints = ColumnHints(date_col="fecha", amount_col="monto", desc_col="desc", id_col="__id__")
     meta = {"source": origen, "rows": len(prepared), "hints": hints.__dict__}
     return prepared, meta
@@ -163,8 +163,9 @@ def build_output_sheet(
     matches: Dict[int, Dict[str, Any]],
     ventas: pd.DataFrame | None = None,
     compras: pd.DataFrame | None = None,
+    copy: bool = True,
 ) -> pd.DataFrame:
-    result = prepared_extracto.copy()
+    result = prepared_extracto.copy() if copy else prepared_extracto
     # Columnas de salida completas
     for col in [
         "Fecha",
@@ -10,7 +10,7 @@ Objetivos:
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, Optional, Tuple
+from typing import Any, Callable, Dict, Optional, Tuple
 import re
 import pandas as pd
 from unidecode import unidecode
@@ -23,8 +23,9 @@ def _slug(s: str) -> str:
     return s
 
 
-def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    normalized = df.copy()
+def normalize_columns(df: pd.DataFrame, copy: bool = True) -> pd.DataFrame:
+    # copy=False renombra en el mismo frame (útil cuando el llamador ya es dueño del DataFrame)
+    normalized = df.copy() if copy else df
     normalized.columns = [_slug(c) for c in normalized.columns]
     return normalized
 
@@ -113,6 +114,24 @@ def detect_libro_columns(df: pd.DataFrame) -> Dict[str, Optional[str]]:
     return {"fecha": fecha, "total": total, "comprobante": comp, "desc": desc}
 
 
+def resolve_libro_projection(columns: list[str]) -> Optional[list[str]]:
+    """
+    Columnas (ya normalizadas) que necesita un libro para conciliar.
+
+    Incluye las que resuelve detect_libro_columns y cualquiera que pueda
+    resolver detect_columns en el matcher, de modo que el resultado sea el
+    mismo que con todas las columnas. Devuelve None si hace falta leer todo
+    (sin columna de descripción se concatenan todas las de texto).
+    """
+    cols = detect_libro_columns(pd.DataFrame(columns=columns))
+    if not cols["desc"]:
+        return None
+    patterns = DATE_PATTERNS + AMOUNT_PATTERNS + DESC_PATTERNS
+    keep = {c for c in cols.values() if c}
+    keep.update(c for c in columns if any(re.search(p, c) for p in patterns))
+    return [c for c in columns if c in keep]
+
+
 def parse_amount(value) -> Optional[float]:
     if value is None or (isinstance(value, float) and pd.isna(value)):
         return None
@@ -143,6 +162,29 @@ def parse_date(value) -> Optional[pd.Timestamp]:
         return None
 
 
+def _clean_text(s: str) -> str:
+    return unidecode(s).strip()
+
+
+def _memo(fn: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """
+    Envuelve un parser por fila para reutilizar el resultado de valores repetidos
+    (fechas e importes se repiten mucho en extractos y libros).
+    """
+    cache: Dict[Any, Any] = {}
+
+    def cached(value):
+        try:
+            return cache[value]
+        except KeyError:
+            result = cache[value] = fn(value)
+            return result
+        except TypeError:
+            return fn(value)
+
+    return cached
+
+
 def coerce_dataframe(df: pd.DataFrame) -> Tuple[pd.DataFrame, ColumnHints]:
     """
     - Normaliza nombres de columnas
@@ -167,15 +209,18 @@ def coerce_dataframe(df: pd.DataFrame) -> Tuple[pd.DataFrame, ColumnHints]:
     return df2, hints
 
 
-def coerce_extracto(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Optional[str]]]:
-    dfn = normalize_columns(df)
+def coerce_extracto(df: pd.DataFrame, copy: bool = True, memoize: bool = False) -> Tuple[pd.DataFrame, Dict[str, Optional[str]]]:
+    dfn = normalize_columns(df, copy=copy)
     cols = detect_extracto_columns(dfn)
+    date_fn = _memo(parse_date) if memoize else parse_date
+    amount_fn = _memo(parse_amount) if memoize else parse_amount
+    text_fn = _memo(_clean_text) if memoize else _clean_text
     # Construir columnas estándar: fecha, texto, monto (con signo) y tipo
     if cols["fecha"]:
-        dfn[cols["fecha"]] = dfn[cols["fecha"]].apply(parse_date)
+        dfn[cols["fecha"]] = dfn[cols["fecha"]].apply(date_fn)
     texto_col = cols["texto"] or ""
     if texto_col in dfn.columns:
-        dfn[texto_col] = dfn[texto_col].astype(str).fillna("").map(lambda s: unidecode(s).strip())
+        dfn[texto_col] = dfn[texto_col].astype(str).fillna("").map(text_fn)
     else:
         # Fallback: concatenar columnas de texto para tener un campo robusto para IA
         text_cols = [c for c in dfn.columns if dfn[c].dtype == object and c not in (cols.get("credito"), cols.get("debito"))]
@@ -190,12 +235,12 @@ def coerce_extracto(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Optional[
     monto_series = pd.Series([None] * len(dfn), dtype="float64")
     tipo_series = pd.Series([None] * len(dfn), dtype="object")
     if cols["credito"] and cols["credito"] in dfn.columns:
-        cr = dfn[cols["credito"]].apply(parse_amount)
+        cr = dfn[cols["credito"]].apply(amount_fn)
         sel = cr.fillna(0) != 0
         monto_series = monto_series.mask(sel, cr.abs())
         tipo_series = tipo_series.mask(sel, "Credito")
     if cols["debito"] and cols["debito"] in dfn.columns:
-        db = dfn[cols["debito"]].apply(parse_amount)
+        db = dfn[cols["debito"]].apply(amount_fn)
         sel = db.fillna(0) != 0
         # Débito lo representamos con monto positivo pero tipo indica dirección
         monto_series = monto_series.mask(sel, db.abs())
@@ -209,13 +254,16 @@ def coerce_extracto(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Optional[
     return dfn, cols
 
 
-def coerce_libro(df: pd.DataFrame, origen: str) -> Tuple[pd.DataFrame, Dict[str, Optional[str]]]:
-    dfn = normalize_columns(df)
+def coerce_libro(df: pd.DataFrame, origen: str, copy: bool = True, memoize: bool = False) -> Tuple[pd.DataFrame, Dict[str, Optional[str]]]:
+    dfn = normalize_columns(df, copy=copy)
     cols = detect_libro_columns(dfn)
+    date_fn = _memo(parse_date) if memoize else parse_date
+    amount_fn = _memo(parse_amount) if memoize else parse_amount
+    text_fn = _memo(_clean_text) if memoize else _clean_text
     if cols["fecha"]:
-        dfn[cols["fecha"]] = dfn[cols["fecha"]].apply(parse_date)
+        dfn[cols["fecha"]] = dfn[cols["fecha"]].apply(date_fn)
     if cols["total"] and cols["total"] in dfn.columns:
-        dfn["monto"] = dfn[cols["total"]].apply(parse_amount).astype(float)
+        dfn["monto"] = dfn[cols["total"]].apply(amount_fn).astype(float)
     else:
         dfn["monto"] = 0.0
     if cols["comprobante"] and cols["comprobante"] in dfn.columns:
@@ -224,7 +272,7 @@ def coerce_libro(df: pd.DataFrame, origen: str) -> Tuple[pd.DataFrame, Dict[str,
         dfn["comprobante"] = ""
     desc_col = cols.get("desc") or ""
     if desc_col in dfn.columns:
-        dfn["desc"] = dfn[desc_col].astype(str).fillna("").map(lambda s: unidecode(s).strip())
+        dfn["desc"] = dfn[desc_col].astype(str).fillna("").map(text_fn)
     else:
         # Fallback: concatenar columnas de texto para IA
         text_cols = [c for c in dfn.columns if dfn[c].dtype == object and c not in (cols.get("total"), cols.get("comprobante"))]
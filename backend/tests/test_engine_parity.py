@@ -0,0 +1,143 @@
+"""
+Paridad entre el motor pandas (por defecto) y el motor columnar.
+
+La proyección de columnas y la memoización de parsers solo son válidas si la
+hoja de salida es idéntica a la del motor pandas; estos casos lo verifican.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures.process import BrokenProcessPool
+import io
+import os
+import random
+
+import pandas as pd
+import pytest
+
+from core import columnar
+from core.columnar import prepare_inputs, read_libro_projected
+from core.excel_io import read_table
+from core.matcher import build_output_sheet, multipass_match, prep_extracto, prep_libro
+
+N = 200
+
+
+def _extracto(rng: random.Random) -> pd.DataFrame:
+    return pd.DataFrame({
+        "Fecha": [f"{rng.randint(1, 28):02d}/03/2024" for _ in range(N)],
+        "Concepto": [rng.choice(["Transferencia ACME", "Comision mantenimiento", "IVA", "Pago Foo SA"]) for _ in range(N)],
+        "Crédito": [rng.choice(["", "1.234,50", "500,00"]) for _ in range(N)],
+        "Débito": [rng.choice(["", "200,00", "(1.000,00)"]) for _ in range(N)],
+        "Saldo": ["x"] * N,
+    })
+
+
+def _libro(rng: random.Random, desc: bool = True, extra_importe: bool = False) -> pd.DataFrame:
+    data = {
+        "Fecha": [f"{rng.randint(1, 28):02d}/03/2024" for _ in range(N)],
+        "Nro Comprobante": [f"A-{i}" for i in range(N)],
+        "Total": [rng.choice(["1.234,50", "500,00", "200,00", "1.000,00"]) for _ in range(N)],
+        "CUIT": ["20-1"] * N,
+        "Neto": ["1"] * N,
+        "Razon": ["foo"] * N,
+    }
+    if desc:
+        data["Descripción"] = [rng.choice(["ACME", "Foo SA", "Bar"]) for _ in range(N)]
+    if extra_importe:
+        data["Importe"] = ["9"] * N
+    df = pd.DataFrame(data)
+    df.iloc[5] = None  # fila vacía
+    return df
+
+
+def _encode(df: pd.DataFrame, kind: str, fmt: str) -> tuple[bytes, str]:
+    if fmt == "csv":
+        return df.to_csv(index=False).encode(), f"{kind}.csv"
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False, sheet_name="Hoja1")
+    return buffer.getvalue(), f"{kind}.xlsx"
+
+
+def _run_pandas(extracto, ventas, compras) -> pd.DataFrame:
+    ext_df = read_table(*extracto, "extracto")
+    E, _ = prep_extracto(ext_df)
+    V, _ = prep_libro(read_table(*ventas, "ventas"), origen="Ventas")
+    C, _ = prep_libro(read_table(*compras, "compras"), origen="Compras")
+    return build_output_sheet(ext_df, E, multipass_match(E, V, C), ventas=V, compras=C)
+
+
+def _run_columnar(extracto, ventas, compras, workers: int = 1) -> pd.DataFrame:
+    E, V, C = prepare_inputs(extracto, ventas, compras, workers=workers)
+    return build_output_sheet(E, E, multipass_match(E, V, C), ventas=V, compras=C, copy=False)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "xlsx"])
+@pytest.mark.parametrize(
+    "desc,extra_importe",
+    [(True, False), (False, False), (True, True)],
+    ids=["projected", "sin-descripcion", "importe-extra"],
+)
+def test_columnar_matches_pandas(fmt, desc, extra_importe):
+    rng = random.Random(1)
+    uploads = (
+        _encode(_extracto(rng), "extracto", fmt),
+        _encode(_libro(rng, desc, extra_importe), "ventas", fmt),
+        _encode(_libro(rng, desc, extra_importe), "compras", fmt),
+    )
+    expected = _run_pandas(*uploads)
+    if not extra_importe:
+        # Con "Importe" crudo el matcher toma esa columna y no concilia nada
+        assert (expected["Origen"] != "").any()
+    assert expected.equals(_run_columnar(*uploads))
+
+
+@pytest.fixture
+def multi_cpu(monkeypatch):
+    # Fuerza el camino con procesos aunque la máquina tenga un solo CPU
+    monkeypatch.setattr(columnar, "available_cpus", lambda: 4)
+
+
+def test_columnar_matches_pandas_with_workers(multi_cpu):
+    rng = random.Random(2)
+    uploads = (
+        _encode(_extracto(rng), "extracto", "xlsx"),
+        _encode(_libro(rng), "ventas", "csv"),
+        _encode(_libro(rng), "compras", "xlsx"),
+    )
+    assert _run_pandas(*uploads).equals(_run_columnar(*uploads, workers=3))
+
+
+def test_csv_with_extra_fields_keeps_full_read_alignment():
+    # Filas con un campo más que la cabecera: pandas usa la primera columna como índice
+    content = b"Fecha,Detalle,Total,CUIT\n1,01/03/2024,a,100,20-1\n2,02/03/2024,b,200,20-2\n"
+    expected = read_table(content, "ventas.csv", "ventas")
+    projected = read_libro_projected(content, "ventas.csv", "ventas")
+    assert projected.equals(expected[["Fecha", "Detalle", "Total"]])
+
+
+def test_csv_with_ragged_row_fails_like_full_read():
+    # Una sola fila con un campo de más: read_csv completo falla y el motor columnar también
+    content = b"Fecha,Detalle,Total,CUIT,Neto\n01/03/2024,a,100,20-1,1\n02/03/2024,b,200,20-2,1,EXTRA\n"
+    with pytest.raises(pd.errors.ParserError):
+        read_table(content, "ventas.csv", "ventas")
+    with pytest.raises(pd.errors.ParserError):
+        read_libro_projected(content, "ventas.csv", "ventas")
+
+
+def test_broken_pool_is_replaced(multi_cpu):
+    rng = random.Random(3)
+    uploads = (
+        _encode(_extracto(rng), "extracto", "csv"),
+        _encode(_libro(rng), "ventas", "csv"),
+        _encode(_libro(rng), "compras", "csv"),
+    )
+    broken = columnar._get_pool()
+    with pytest.raises(BrokenProcessPool):
+        broken.submit(os._exit, 1).result()
+
+    # La solicitud siguiente se resuelve en el proceso y el pool roto se descarta
+    assert _run_pandas(*uploads).equals(_run_columnar(*uploads, workers=3))
+    assert columnar._POOL is None
+    assert _run_pandas(*uploads).equals(_run_columnar(*uploads, workers=3))
+    assert columnar._get_pool() is not broken